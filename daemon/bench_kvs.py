@@ -3,12 +3,36 @@
 
 import argparse
 import asyncio
+import itertools
+import multiprocessing
+import os
+import queue as queue_mod
 import random
+import socket
 import string
+import sys
 import time
+from array import array
+from collections import deque
 from dataclasses import dataclass
 from statistics import mean
 
+try:
+    import numpy as np
+except ImportError:  # optional; pure-Python fallbacks are used without it
+    np = None
+
+# flush() drains the transport every DRAIN_EVERY writes, or sooner once the
+# transport buffer passes DRAIN_HIGH_WATER bytes
+DRAIN_EVERY = 16
+DRAIN_HIGH_WATER = 64 * 1024
+# preload_many() flushes once this many bytes of commands are queued
+PRELOAD_FLUSH_BYTES = 1024 * 1024
+# --processes: how long a shard waits at the start line for the others, and
+# how often the parent checks for shards that died without reporting
+SHARD_START_TIMEOUT_S = 60.0
+SHARD_POLL_S = 0.5
+
 # -----------------------------
 # utils
 # -----------------------------
@@ -22,11 +46,36 @@ def percentile(sorted_vals, p: float):
         return sorted_vals[f]
     return sorted_vals[f] + (sorted_vals[c] - sorted_vals[f]) * (k - f)
 
+def set_tcp_nodelay(transport: asyncio.BaseTransport):
+    # small per-op writes must not wait on Nagle's algorithm
+    sock = transport.get_extra_info("socket")
+    if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
 def rand_bytes(n: int) -> bytes:
     return b"x" * n
 
+def make_op_plan(seed: int, nkeys: int, count: int, sample_rate: float):
+    # key index and latency-sample flag for each of a worker's ops, drawn
+    # up front so the hot loop does no RNG calls
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, nkeys, size=count).tolist()
+        sample = (rng.random(count) < sample_rate).tolist()
+        return idx, sample
+    r = random.Random(seed)
+    idx = [r.randrange(nkeys) for _ in range(count)]
+    sample = [r.random() < sample_rate for _ in range(count)]
+    return idx, sample
+
 def make_keys(n: int, key_len: int):
     alphabet = string.ascii_letters + string.digits
+    if np is not None:
+        # one RNG call for the whole keyspace instead of one per character
+        rng = np.random.default_rng(42)
+        table = np.frombuffer(alphabet.encode(), dtype=np.uint8)
+        chars = table[rng.integers(0, len(table), size=(n, key_len - 1))]
+        return [b"k" + row.tobytes() for row in chars]
     keys = []
     r = random.Random(42)
     for _ in range(n):
@@ -34,122 +83,474 @@ def make_keys(n: int, key_len: int):
     return keys
 
 
+# -----------------------------
+# Pipelined request/response over a raw asyncio transport.
+# Replies arrive in request order and are parsed straight out of the
+# receive buffer; subclasses implement _parse_reply() for their protocol.
+# -----------------------------
+class KVProtocol(asyncio.Protocol):
+    def __init__(self):
+        self.transport = None
+        self.writelines = None
+        self._rbuf = bytearray()
+        # resume point of the last unfinished newline search
+        self._scan_start = -1
+        self._scan_pos = 0
+        # (is_get, future) per in-flight command, in send order
+        self._pending = deque()
+        # chunks queued by request() until the next flush(); they go out in
+        # one writelines() call, which on Python 3.12+ is a single sendmsg()
+        # over all chunks, so payloads are never copied into a joined buffer
+        self._wbuf = []
+        self.buffered = 0
+        self._pending_writes = 0
+        self._paused = False
+        self._drain_waiter = None
+        self._exc = None
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        # flush() hands each batch to this; a client may swap in another sender
+        self.writelines = transport.writelines
+
+    def connection_lost(self, exc):
+        self._exc = exc or RuntimeError("connection closed")
+        self._fail_pending(self._exc)
+        self._wake_drain()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wake_drain()
+
+    def _wake_drain(self):
+        w, self._drain_waiter = self._drain_waiter, None
+        if w is not None and not w.done():
+            w.set_result(None)
+
+    def _fail_pending(self, exc: Exception):
+        while self._pending:
+            _, fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def _find_line(self, start: int) -> int:
+        # only scan bytes that arrived since the last failed search for this line
+        frm = self._scan_pos if start == self._scan_start else start
+        i = self._rbuf.find(b"\n", frm)
+        if i < 0:
+            self._scan_start = start
+            self._scan_pos = len(self._rbuf)
+        return i
+
+    def _parse_reply(self, is_get: bool, pos: int):
+        """
+        Parse one reply starting at self._rbuf[pos].
+        Returns (result, end) once complete, or None if more data is needed.
+        A result that is an Exception fails only that command; raising
+        RuntimeError means the stream is out of sync and fails the connection.
+        """
+        raise NotImplementedError
+
+    def data_received(self, data):
+        buf = self._rbuf
+        buf += data
+        pending = self._pending
+        pos = 0
+        try:
+            while pending:
+                r = self._parse_reply(pending[0][0], pos)
+                if r is None:
+                    break
+                res, pos = r
+                _, fut = pending.popleft()
+                if fut.done():
+                    continue
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+            if not pending and pos < len(buf):
+                raise RuntimeError(f"unexpected response: {bytes(buf[pos:pos + 64])!r}")
+        except (RuntimeError, ValueError, IndexError) as e:
+            self._fail_pending(e)
+            self.transport.close()
+            return
+        if pos:
+            del buf[:pos]
+            self._scan_start -= pos
+            self._scan_pos -= pos
+
+    def request(self, is_get: bool, *parts: bytes) -> asyncio.Future:
+        if self._exc is not None:
+            raise self._exc
+        self._wbuf += parts
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((is_get, fut))
+        self.buffered += 1
+        return fut
+
+    async def flush(self):
+        if not self.buffered:
+            return
+        chunks, self._wbuf = self._wbuf, []
+        self.buffered = 0
+        self.writelines(chunks)
+        self._pending_writes += 1
+        if (self._pending_writes >= DRAIN_EVERY
+                or self.transport.get_write_buffer_size() >= DRAIN_HIGH_WATER):
+            self._pending_writes = 0
+            await self.drain()
+
+    async def drain(self):
+        if self._exc is not None:
+            raise self._exc
+        if not self._paused:
+            return
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        await self._drain_waiter
+        if self._exc is not None:
+            raise self._exc
+
+    async def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            await self._closed
+
+
 # -----------------------------
 # Hinotetsu client (README protocol)
 #   set <key> <value>\n -> STORED
 #   get <key>\n -> <value>\n or NOT_FOUND\n (assumption)
 # -----------------------------
+class HinotetsuProtocol(KVProtocol):
+    def _parse_reply(self, is_get: bool, pos: int):
+        i = self._find_line(pos)
+        if i < 0:
+            return None
+        buf = self._rbuf
+        end = i - 1 if i > pos and buf[i - 1] == 0x0D else i
+        if is_get:
+            v = bytes(buf[pos:end])
+            return (None if v in (b"NOT_FOUND", b"END", b"") else v), i + 1
+        if buf[pos:end].strip() != b"STORED":
+            return RuntimeError(f"set failed: {bytes(buf[pos:i + 1])!r}"), i + 1
+        return None, i + 1
+
+
 class HinotetsuClient:
-    def __init__(self, host: str, port: int, timeout_s: float = 5.0):
+    def __init__(self, host: str, port: int, timeout_s: float = 5.0, uds: str | None = None):
         self.host = host
         self.port = port
         self.timeout_s = timeout_s
-        self.reader = None
-        self.writer = None
+        # Unix domain socket path; used instead of host:port when set
+        self.uds = uds
+        self.proto = None
 
     async def connect(self):
-        self.reader, self.writer = await asyncio.wait_for(
-            asyncio.open_connection(self.host, self.port),
-            timeout=self.timeout_s
-        )
+        loop = asyncio.get_running_loop()
+        if self.uds:
+            conn = loop.create_unix_connection(HinotetsuProtocol, self.uds)
+        else:
+            conn = loop.create_connection(HinotetsuProtocol, self.host, self.port)
+        transport, self.proto = await asyncio.wait_for(conn, timeout=self.timeout_s)
+        set_tcp_nodelay(transport)
 
     async def close(self):
-        if self.writer:
-            self.writer.close()
-            try:
-                await self.writer.wait_closed()
-            except Exception:
-                pass
+        if self.proto:
+            await self.proto.close()
 
-    async def set(self, key: bytes, value: bytes) -> None:
+    @property
+    def buffered(self) -> int:
+        return self.proto.buffered
+
+    @staticmethod
+    def set_cmd(key: bytes, value: bytes) -> bytes:
         # Hinotetsu CLI example: "set name Alice"
         # Use \n (most servers accept \r\n too; \n matches typical simple parsers)
-        cmd = b"set " + key + b" " + value + b"\n"
-        self.writer.write(cmd)
-        await self.writer.drain()
+        return b"".join((b"set ", key, b" ", value, b"\n"))
+
+    @staticmethod
+    def get_cmd(key: bytes) -> bytes:
+        return b"".join((b"get ", key, b"\n"))
+
+    # send_*_cmd take command bytes prebuilt with set_cmd()/get_cmd()
+    def send_set_cmd(self, cmd: bytes) -> asyncio.Future:
+        return self.proto.request(False, cmd)
+
+    def send_get_cmd(self, cmd: bytes) -> asyncio.Future:
+        return self.proto.request(True, cmd)
 
-        line = await self.reader.readline()
-        if not line:
-            raise RuntimeError("no response")
-        if line.strip() != b"STORED":
-            raise RuntimeError(f"set failed: {line!r}")
+    def send_set(self, key: bytes, value: bytes) -> asyncio.Future:
+        return self.send_set_cmd(self.set_cmd(key, value))
+
+    def send_get(self, key: bytes) -> asyncio.Future:
+        return self.send_get_cmd(self.get_cmd(key))
+
+    async def flush(self):
+        await self.proto.flush()
+
+    async def set(self, key: bytes, value: bytes) -> None:
+        fut = self.send_set(key, value)
+        await self.flush()
+        await fut
 
     async def get(self, key: bytes) -> bytes | None:
-        self.writer.write(b"get " + key + b"\n")
-        await self.writer.drain()
-
-        line = await self.reader.readline()
-        if not line:
-            raise RuntimeError("no response")
-        v = line.rstrip(b"\r\n")
-        if v in (b"NOT_FOUND", b"END", b""):
-            return None
-        return v
+        fut = self.send_get(key)
+        await self.flush()
+        return await fut
+
+    async def preload_many(self, keys: list[bytes], value: bytes) -> None:
+        # offline pipeline: stream every set, then collect every STORED
+        batch = max(1, PRELOAD_FLUSH_BYTES // (len(value) + 64))
+        futs = []
+        for key in keys:
+            futs.append(self.send_set(key, value))
+            if self.buffered >= batch:
+                await self.flush()
+        await self.flush()
+        await asyncio.gather(*futs)
+
+
+# -----------------------------
+# io_uring send path (optional: Linux >= 5.6, pip install liburing)
+# Writes from every connection on the loop become SQEs that go out with a
+# single io_uring_submit() per loop iteration, instead of one send() per
+# socket. Completions are reaped through an eventfd on the loop; replies
+# are still read by the asyncio transport.
+# -----------------------------
+class UringSender:
+    def __init__(self, entries: int = 256):
+        try:
+            import liburing
+        except ImportError as e:
+            raise RuntimeError("liburing not installed. pip install liburing") from e
+        release = tuple(int(x) for x in os.uname().release.split(".")[:2] if x.isdigit())
+        if release < (5, 6):
+            raise RuntimeError(f"io_uring send needs Linux >= 5.6 (running {os.uname().release})")
+        self._lu = liburing
+        self._ring = liburing.Ring()
+        self._cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(entries, self._ring)
+        self._efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        liburing.io_uring_register_eventfd(self._ring, self._efd)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._efd, self._reap)
+        # user_data -> (UringSocket, buffer); keeps buffers alive until the CQE
+        self._inflight = {}
+        self._next_id = 0
+        self._unsubmitted = 0
+
+    def close(self):
+        self._loop.remove_reader(self._efd)
+        self._lu.io_uring_queue_exit(self._ring)
+        os.close(self._efd)
+        self._inflight.clear()
+
+    def prep_send(self, us: "UringSocket", buf: bytes | bytearray):
+        lu = self._lu
+        sqe = lu.io_uring_get_sqe(self._ring)
+        if sqe is None:  # SQ ring full: push out what is queued
+            self._submit()
+            sqe = lu.io_uring_get_sqe(self._ring)
+        lu.io_uring_prep_send(sqe, us.fd, buf)
+        self._next_id += 1
+        sqe.user_data = self._next_id
+        self._inflight[self._next_id] = (us, buf)
+        if not self._unsubmitted:
+            self._loop.call_soon(self._submit)
+        self._unsubmitted += 1
+
+    def _submit(self):
+        if self._unsubmitted:
+            self._unsubmitted = 0
+            self._lu.io_uring_submit(self._ring)
+
+    def _reap(self):
+        lu = self._lu
+        try:
+            os.eventfd_read(self._efd)
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                lu.io_uring_peek_cqe(self._ring, self._cqe)
+            except BlockingIOError:
+                break
+            c = self._cqe[0]
+            us, buf = self._inflight.pop(c.user_data)
+            try:
+                res = c.res
+            except OSError as e:  # negative res is raised as OSError
+                res = e
+            lu.io_uring_cqe_seen(self._ring, c)
+            us.sent(buf, res)
+
+
+class UringSocket:
+    """
+    Write side of one connection through a UringSender.
+    At most one send per socket is in flight, so a short send can be
+    resumed without reordering the byte stream; later writes wait in a
+    backlog that goes out as one send.
+    """
+    def __init__(self, sender: UringSender, transport: asyncio.Transport):
+        self._sender = sender
+        self._transport = transport
+        self.fd = transport.get_extra_info("socket").fileno()
+        self._busy = False
+        self._backlog = bytearray()
+
+    def writelines(self, chunks: list[bytes]):
+        if self._busy:
+            for c in chunks:
+                self._backlog += c
+            return
+        self._busy = True
+        self._sender.prep_send(self, b"".join(chunks))
+
+    def sent(self, buf: bytes | bytearray, res):
+        if isinstance(res, OSError):
+            # connection_lost() fails the pending futures
+            self._transport.abort()
+        elif res < len(buf):
+            self._sender.prep_send(self, buf[res:])
+        elif self._backlog:
+            buf, self._backlog = self._backlog, bytearray()
+            self._sender.prep_send(self, buf)
+        else:
+            self._busy = False
+
+
+class HinotetsuUringClient(HinotetsuClient):
+    """HinotetsuClient whose writes are batched through a shared UringSender."""
+    def __init__(self, host: str, port: int, sender: UringSender, timeout_s: float = 5.0,
+                 uds: str | None = None):
+        super().__init__(host, port, timeout_s=timeout_s, uds=uds)
+        self.sender = sender
+
+    async def connect(self):
+        await super().connect()
+        self.proto.writelines = UringSocket(self.sender, self.proto.transport).writelines
 
 
 # -----------------------------
 # Memcached text protocol client
 # -----------------------------
-class MemcachedTextClient:
+class MemcachedProtocol(KVProtocol):
     """
     set <key> <flags> <exptime> <bytes>\r\n<data>\r\n -> STORED\r\n
     get <key>\r\n -> VALUE ... \r\n<data>\r\nEND\r\n   or END\r\n
     """
-    def __init__(self, host: str, port: int, timeout_s: float = 5.0):
+    def _parse_reply(self, is_get: bool, pos: int):
+        i = self._find_line(pos)
+        if i < 0:
+            return None
+        buf = self._rbuf
+        if not is_get:
+            if buf[pos:i + 1].strip() != b"STORED":
+                return RuntimeError(f"set failed: {bytes(buf[pos:i + 1])!r}"), i + 1
+            return None, i + 1
+
+        if not buf.startswith(b"VALUE ", pos):
+            if buf[pos:i + 1].strip() == b"END":
+                return None, i + 1
+            raise RuntimeError(f"bad response: {bytes(buf[pos:i + 1])!r}")
+
+        # VALUE <key> <flags> <bytes>\r\n: <bytes> is the last field, so slice
+        # it out rather than tokenizing the line (int() drops the \r)
+        sp = buf.rindex(b" ", pos, i)
+        nbytes = int(buf[sp + 1:i])
+        start = i + 1
+        stop = start + nbytes
+        if len(buf) < stop + 2:  # <data>\r\n
+            return None
+        j = self._find_line(stop + 2)
+        if j < 0:
+            return None
+        if buf[stop + 2:j + 1].strip() != b"END":
+            raise RuntimeError(f"expected END, got: {bytes(buf[stop + 2:j + 1])!r}")
+        return bytes(buf[start:stop]), j + 1
+
+
+class MemcachedTextClient:
+    def __init__(self, host: str, port: int, timeout_s: float = 5.0, uds: str | None = None):
         self.host = host
         self.port = port
         self.timeout_s = timeout_s
-        self.reader = None
-        self.writer = None
+        # Unix domain socket path; used instead of host:port when set
+        self.uds = uds
+        self.proto = None
 
     async def connect(self):
-        self.reader, self.writer = await asyncio.wait_for(
-            asyncio.open_connection(self.host, self.port),
-            timeout=self.timeout_s
-        )
+        loop = asyncio.get_running_loop()
+        if self.uds:
+            conn = loop.create_unix_connection(MemcachedProtocol, self.uds)
+        else:
+            conn = loop.create_connection(MemcachedProtocol, self.host, self.port)
+        transport, self.proto = await asyncio.wait_for(conn, timeout=self.timeout_s)
+        set_tcp_nodelay(transport)
 
     async def close(self):
-        if self.writer:
-            self.writer.close()
-            try:
-                await self.writer.wait_closed()
-            except Exception:
-                pass
+        if self.proto:
+            await self.proto.close()
+
+    @property
+    def buffered(self) -> int:
+        return self.proto.buffered
+
+    @staticmethod
+    def set_header(key: bytes, nbytes: int, exptime: int = 0) -> bytes:
+        return b"".join((b"set ", key, b" 0 ", str(exptime).encode(), b" ", str(nbytes).encode(), b"\r\n"))
+
+    @staticmethod
+    def get_cmd(key: bytes) -> bytes:
+        return b"".join((b"get ", key, b"\r\n"))
+
+    # send_*_cmd take prebuilt bytes: a set_header() plus the data followed
+    # by \r\n, or a get_cmd()
+    def send_set_cmd(self, header: bytes, trailer: bytes) -> asyncio.Future:
+        # header and data are separate chunks of the same vectored write
+        return self.proto.request(False, header, trailer)
+
+    def send_get_cmd(self, cmd: bytes) -> asyncio.Future:
+        return self.proto.request(True, cmd)
+
+    def send_set(self, key: bytes, value: bytes, exptime: int = 0) -> asyncio.Future:
+        return self.send_set_cmd(self.set_header(key, len(value), exptime), value + b"\r\n")
+
+    def send_get(self, key: bytes) -> asyncio.Future:
+        return self.send_get_cmd(self.get_cmd(key))
+
+    async def flush(self):
+        await self.proto.flush()
 
     async def set(self, key: bytes, value: bytes, exptime: int = 0) -> None:
-        header = (
-            b"set " + key + b" 0 " + str(exptime).encode() + b" " + str(len(value)).encode() + b"\r\n"
-        )
-        self.writer.write(header)
-        self.writer.write(value + b"\r\n")
-        await self.writer.drain()
-
-        line = await self.reader.readline()
-        if not line:
-            raise RuntimeError("no response")
-        if line.strip() != b"STORED":
-            raise RuntimeError(f"set failed: {line!r}")
+        fut = self.send_set(key, value, exptime=exptime)
+        await self.flush()
+        await fut
 
     async def get(self, key: bytes) -> bytes | None:
-        self.writer.write(b"get " + key + b"\r\n")
-        await self.writer.drain()
+        fut = self.send_get(key)
+        await self.flush()
+        return await fut
 
-        first = await self.reader.readline()
-        if not first:
-            raise RuntimeError("no response")
-        if first.strip() == b"END":
-            return None
-        if not first.startswith(b"VALUE "):
-            raise RuntimeError(f"bad response: {first!r}")
-
-        parts = first.split()
-        nbytes = int(parts[3])
-        data = await self.reader.readexactly(nbytes)
-        _ = await self.reader.readexactly(2)  # \r\n
-        end = await self.reader.readline()
-        if end.strip() != b"END":
-            raise RuntimeError(f"expected END, got: {end!r}")
-        return data
+    async def preload_many(self, keys: list[bytes], value: bytes, exptime: int = 0) -> None:
+        # offline pipeline: stream every set, then collect every STORED
+        batch = max(1, PRELOAD_FLUSH_BYTES // (len(value) + 64))
+        trailer = value + b"\r\n"
+        futs = []
+        for key in keys:
+            futs.append(self.send_set_cmd(self.set_header(key, len(value), exptime), trailer))
+            if self.buffered >= batch:
+                await self.flush()
+        await self.flush()
+        await asyncio.gather(*futs)
 
 
 # -----------------------------
@@ -160,7 +561,13 @@ async def redis_make_client(host: str, port: int):
         import redis.asyncio as redis
     except Exception as e:
         raise RuntimeError("redis-py not installed. pip install redis") from e
-    r = redis.Redis(host=host, port=port, decode_responses=False)
+    # redis-py uses the hiredis parser on its own when hiredis is installed
+    # (redis[hiredis]) and sets TCP_NODELAY on every pooled connection. The
+    # pool is built directly because Redis() only takes socket_read_size
+    # from redis-py 8.0 on.
+    pool = redis.ConnectionPool(host=host, port=port, decode_responses=False,
+                                socket_read_size=65536)
+    r = redis.Redis.from_pool(pool)
     await r.ping()
     return r
 
@@ -173,100 +580,240 @@ class BenchResult:
     name: str
     ops: int
     seconds: float
-    lat_ms: list[float]
+    lat_ms: array  # array('d')
 
     def summary(self):
-        s = sorted(self.lat_ms)
+        if np is not None and len(self.lat_ms):
+            # same linear interpolation as percentile(), but in C
+            arr = np.asarray(self.lat_ms, dtype=np.float64)
+            avg = float(arr.mean())
+            p50, p95, p99 = (float(v) for v in np.percentile(arr, [50, 95, 99]))
+        else:
+            s = sorted(self.lat_ms)
+            avg = mean(self.lat_ms) if self.lat_ms else None
+            p50, p95, p99 = percentile(s, 0.50), percentile(s, 0.95), percentile(s, 0.99)
         return {
             "name": self.name,
             "ops": self.ops,
             "seconds": self.seconds,
             "ops_per_sec": self.ops / self.seconds if self.seconds > 0 else 0,
-            "avg_ms": mean(self.lat_ms) if self.lat_ms else None,
-            "p50_ms": percentile(s, 0.50),
-            "p95_ms": percentile(s, 0.95),
-            "p99_ms": percentile(s, 0.99),
+            "avg_ms": avg,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
         }
 
 
+async def finish_inflight(c, inflight: deque, lat: array, n: int) -> int:
+    # flush the tail of the window and collect every outstanding reply
+    await c.flush()
+    while inflight:
+        t0, fut = inflight.popleft()
+        await fut
+        if t0 is not None:
+            lat[n] = (time.perf_counter() - t0) * 1000.0
+            n += 1
+    return n
+
+
+def split_ops(total_ops: int, concurrency: int) -> list[int]:
+    per = total_ops // concurrency
+    rem = total_ops % concurrency
+    return [per + (1 if i < rem else 0) for i in range(concurrency)]
+
+
+def alloc_lat(plans: list) -> tuple[array, list[int]]:
+    # one preallocated slot per sampled op, so the workers store unboxed
+    # doubles by index instead of growing lists; worker i fills
+    # lat[offs[i]:offs[i + 1]]
+    offs = [0, *itertools.accumulate(sum(sample) for _, sample in plans)]
+    return array("d", [0.0]) * offs[-1], offs
+
+
+# first_worker offsets the per-worker RNG seeds so that shards in other
+# processes draw different keys; ready() is awaited just before the clock
+# starts so that all shards begin together.
+#
+# The text-protocol workers keep up to `depth` commands in flight (depth=1 is
+# plain request/response). Commands are written in batches of half the
+# window, so the oldest in-flight command has always been flushed before it
+# is awaited. Only sampled ops pay for the timer calls. Each mode has its
+# own worker so the hot loop never re-checks the mode.
 async def bench_hinotetsu(host: str, port: int, keys: list[bytes], value_size: int,
-                         concurrency: int, total_ops: int, mode: str):
-    lat = []
+                         concurrency: int, total_ops: int, mode: str, depth: int = 1,
+                         sample_rate: float = 1.0, uds: str | None = None, io: str = "stream",
+                         first_worker: int = 0, ready=None):
     payload = rand_bytes(value_size)
 
-    clients = [HinotetsuClient(host, port) for _ in range(concurrency)]
+    # build every command once up front so the worker loop only indexes
+    set_cmds = [HinotetsuClient.set_cmd(k, payload) for k in keys] if mode != "get" else None
+    get_cmds = [HinotetsuClient.get_cmd(k) for k in keys] if mode != "set" else None
+
+    sender = None
+    if io == "uring":
+        try:
+            sender = UringSender()
+        except (RuntimeError, OSError) as e:
+            print(f"io_uring unavailable, using stream writes: {e}", file=sys.stderr)
+    if sender is not None:
+        clients = [HinotetsuUringClient(host, port, sender, uds=uds) for _ in range(concurrency)]
+    else:
+        clients = [HinotetsuClient(host, port, uds=uds) for _ in range(concurrency)]
     for c in clients:
         await c.connect()
+    batch = (depth + 1) // 2
 
-    async def worker(idx: int, count: int):
-        c = clients[idx]
-        r = random.Random(1000 + idx)
-        for i in range(count):
-            key = keys[r.randrange(len(keys))]
-            t0 = time.perf_counter()
-            if mode == "set":
-                await c.set(key, payload)
-            elif mode == "get":
-                _ = await c.get(key)
-            elif mode == "mixed":
-                if (i & 1) == 0:
-                    await c.set(key, payload)
-                else:
-                    _ = await c.get(key)
+    async def worker_set(c: HinotetsuClient, ks: list[int], sample: list[bool], n: int):
+        send = c.send_set_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            inflight.append((t0, send(set_cmds[ks[i]])))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
+
+    async def worker_get(c: HinotetsuClient, ks: list[int], sample: list[bool], n: int):
+        send = c.send_get_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            inflight.append((t0, send(get_cmds[ks[i]])))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
+
+    async def worker_mixed(c: HinotetsuClient, ks: list[int], sample: list[bool], n: int):
+        send_set, send_get = c.send_set_cmd, c.send_get_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            if (i & 1) == 0:
+                fut = send_set(set_cmds[ks[i]])
             else:
-                raise ValueError(mode)
-            t1 = time.perf_counter()
-            lat.append((t1 - t0) * 1000.0)
+                fut = send_get(get_cmds[ks[i]])
+            inflight.append((t0, fut))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
 
-    per = total_ops // concurrency
-    rem = total_ops % concurrency
-    counts = [per + (1 if i < rem else 0) for i in range(concurrency)]
+    fn = {"set": worker_set, "get": worker_get, "mixed": worker_mixed}[mode]
+    counts = split_ops(total_ops, concurrency)
+    plans = [make_op_plan(1000 + first_worker + i, len(keys), counts[i], sample_rate)
+             for i in range(concurrency)]
+    lat, offs = alloc_lat(plans)
+    if ready is not None:
+        await ready()
 
     t0 = time.perf_counter()
-    await asyncio.gather(*[worker(i, counts[i]) for i in range(concurrency)])
+    await asyncio.gather(*[fn(c, *plan, off) for c, plan, off in zip(clients, plans, offs)])
     t1 = time.perf_counter()
 
     for c in clients:
         await c.close()
+    if sender is not None:
+        sender.close()
 
     return BenchResult(name=f"hinotetsu:{mode}", ops=total_ops, seconds=t1 - t0, lat_ms=lat)
 
 
 async def bench_memcached(host: str, port: int, keys: list[bytes], value_size: int,
-                         concurrency: int, total_ops: int, mode: str, exptime: int):
-    lat = []
+                         concurrency: int, total_ops: int, mode: str, exptime: int, depth: int = 1,
+                         sample_rate: float = 1.0, uds: str | None = None,
+                         first_worker: int = 0, ready=None):
     payload = rand_bytes(value_size)
 
-    clients = [MemcachedTextClient(host, port) for _ in range(concurrency)]
+    # per-key headers are tiny; the data block is shared by every set
+    trailer = payload + b"\r\n"
+    set_headers = ([MemcachedTextClient.set_header(k, len(payload), exptime) for k in keys]
+                   if mode != "get" else None)
+    get_cmds = [MemcachedTextClient.get_cmd(k) for k in keys] if mode != "set" else None
+
+    clients = [MemcachedTextClient(host, port, uds=uds) for _ in range(concurrency)]
     for c in clients:
         await c.connect()
+    batch = (depth + 1) // 2
 
-    async def worker(idx: int, count: int):
-        c = clients[idx]
-        r = random.Random(2000 + idx)
-        for i in range(count):
-            key = keys[r.randrange(len(keys))]
-            t0 = time.perf_counter()
-            if mode == "set":
-                await c.set(key, payload, exptime=exptime)
-            elif mode == "get":
-                _ = await c.get(key)
-            elif mode == "mixed":
-                if (i & 1) == 0:
-                    await c.set(key, payload, exptime=exptime)
-                else:
-                    _ = await c.get(key)
+    async def worker_set(c: MemcachedTextClient, ks: list[int], sample: list[bool], n: int):
+        send = c.send_set_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            inflight.append((t0, send(set_headers[ks[i]], trailer)))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
+
+    async def worker_get(c: MemcachedTextClient, ks: list[int], sample: list[bool], n: int):
+        send = c.send_get_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            inflight.append((t0, send(get_cmds[ks[i]])))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
+
+    async def worker_mixed(c: MemcachedTextClient, ks: list[int], sample: list[bool], n: int):
+        send_set, send_get = c.send_set_cmd, c.send_get_cmd
+        inflight = deque()
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            if (i & 1) == 0:
+                fut = send_set(set_headers[ks[i]], trailer)
             else:
-                raise ValueError(mode)
-            t1 = time.perf_counter()
-            lat.append((t1 - t0) * 1000.0)
+                fut = send_get(get_cmds[ks[i]])
+            inflight.append((t0, fut))
+            if c.buffered >= batch:
+                await c.flush()
+            if len(inflight) >= depth:
+                t0, fut = inflight.popleft()
+                await fut
+                if t0 is not None:
+                    lat[n] = (time.perf_counter() - t0) * 1000.0
+                    n += 1
+        return await finish_inflight(c, inflight, lat, n)
 
-    per = total_ops // concurrency
-    rem = total_ops % concurrency
-    counts = [per + (1 if i < rem else 0) for i in range(concurrency)]
+    fn = {"set": worker_set, "get": worker_get, "mixed": worker_mixed}[mode]
+    counts = split_ops(total_ops, concurrency)
+    plans = [make_op_plan(2000 + first_worker + i, len(keys), counts[i], sample_rate)
+             for i in range(concurrency)]
+    lat, offs = alloc_lat(plans)
+    if ready is not None:
+        await ready()
 
     t0 = time.perf_counter()
-    await asyncio.gather(*[worker(i, counts[i]) for i in range(concurrency)])
+    await asyncio.gather(*[fn(c, *plan, off) for c, plan, off in zip(clients, plans, offs)])
     t1 = time.perf_counter()
 
     for c in clients:
@@ -276,48 +823,265 @@ async def bench_memcached(host: str, port: int, keys: list[bytes], value_size: i
 
 
 async def bench_redis(host: str, port: int, keys: list[bytes], value_size: int,
-                     concurrency: int, total_ops: int, mode: str, exptime: int):
+                     concurrency: int, total_ops: int, mode: str, exptime: int, depth: int = 1,
+                     sample_rate: float = 1.0, first_worker: int = 0, ready=None):
     r = await redis_make_client(host, port)
-    lat = []
     payload = rand_bytes(value_size)
+    ex = ("EX", exptime) if exptime > 0 else ()
 
-    async def worker(idx: int, count: int):
-        rr = random.Random(3000 + idx)
-        for i in range(count):
-            key = keys[rr.randrange(len(keys))]
-            t0 = time.perf_counter()
-            if mode == "set":
-                if exptime > 0:
-                    await r.set(key, payload, ex=exptime)
-                else:
-                    await r.set(key, payload)
-            elif mode == "get":
-                _ = await r.get(key)
-            elif mode == "mixed":
-                if (i & 1) == 0:
-                    if exptime > 0:
-                        await r.set(key, payload, ex=exptime)
-                    else:
-                        await r.set(key, payload)
-                else:
-                    _ = await r.get(key)
+    # each worker holds one pooled connection for the whole run and talks
+    # RESP on it directly, skipping execute_command's per-call pool checkout.
+    # set_cmds/get_cmds are encoded below once the connections are checked out.
+    async def worker_set(conn, ks: list[int], sample: list[bool], n: int):
+        send, recv = conn.send_packed_command, conn.read_response
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            await send(set_cmds[ks[i]], False)
+            await recv()
+            if t0 is not None:
+                lat[n] = (time.perf_counter() - t0) * 1000.0
+                n += 1
+        return n
+
+    async def worker_get(conn, ks: list[int], sample: list[bool], n: int):
+        send, recv = conn.send_packed_command, conn.read_response
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            await send(get_cmds[ks[i]], False)
+            await recv()
+            if t0 is not None:
+                lat[n] = (time.perf_counter() - t0) * 1000.0
+                n += 1
+        return n
+
+    async def worker_mixed(conn, ks: list[int], sample: list[bool], n: int):
+        send, recv = conn.send_packed_command, conn.read_response
+        for i in range(len(ks)):
+            t0 = time.perf_counter() if sample[i] else None
+            if (i & 1) == 0:
+                await send(set_cmds[ks[i]], False)
             else:
-                raise ValueError(mode)
+                await send(get_cmds[ks[i]], False)
+            await recv()
+            if t0 is not None:
+                lat[n] = (time.perf_counter() - t0) * 1000.0
+                n += 1
+        return n
+
+    # pipelined mode: batch_* return the commands of ops [i, i + b)
+    def batch_set(ks: list[int], i: int, b: int) -> list[bytes]:
+        return [set_cmds[ks[j]] for j in range(i, i + b)]
+
+    def batch_get(ks: list[int], i: int, b: int) -> list[bytes]:
+        return [get_cmds[ks[j]] for j in range(i, i + b)]
+
+    def batch_mixed(ks: list[int], i: int, b: int) -> list[bytes]:
+        return [set_cmds[ks[j]] if (j & 1) == 0 else get_cmds[ks[j]] for j in range(i, i + b)]
+
+    batch = {"set": batch_set, "get": batch_get, "mixed": batch_mixed}[mode]
+
+    async def worker_pipelined(conn, ks: list[int], sample: list[bool], n: int):
+        # batch `depth` commands per round-trip (one writelines); every
+        # sampled op in a batch shares the batch latency
+        send, recv = conn.send_packed_command, conn.read_response
+        count = len(ks)
+        i = 0
+        while i < count:
+            b = min(depth, count - i)
+            sampled = sum(sample[i:i + b])
+            t0 = time.perf_counter()
+            await send(batch(ks, i, b), False)
+            for _ in range(b):
+                await recv()
             t1 = time.perf_counter()
-            lat.append((t1 - t0) * 1000.0)
+            lat[n:n + sampled] = array("d", [(t1 - t0) * 1000.0]) * sampled
+            n += sampled
+            i += b
+        return n
 
-    per = total_ops // concurrency
-    rem = total_ops % concurrency
-    counts = [per + (1 if i < rem else 0) for i in range(concurrency)]
+    if depth > 1:
+        fn = worker_pipelined
+    else:
+        fn = {"set": worker_set, "get": worker_get, "mixed": worker_mixed}[mode]
+    counts = split_ops(total_ops, concurrency)
+    plans = [make_op_plan(3000 + first_worker + i, len(keys), counts[i], sample_rate)
+             for i in range(concurrency)]
+    lat, offs = alloc_lat(plans)
 
-    t0 = time.perf_counter()
-    await asyncio.gather(*[worker(i, counts[i]) for i in range(concurrency)])
-    t1 = time.perf_counter()
+    pool = r.connection_pool
+    conns = []
+    try:
+        for _ in range(concurrency):
+            conns.append(await pool.get_connection())
 
-    await r.aclose()
+        # encode every command once up front, as for the text protocols
+        pack = conns[0].pack_command
+        set_cmds = [b"".join(pack("SET", k, payload, *ex)) for k in keys] if mode != "get" else None
+        get_cmds = [b"".join(pack("GET", k)) for k in keys] if mode != "set" else None
+
+        if ready is not None:
+            await ready()
+        t0 = time.perf_counter()
+        await asyncio.gather(*[fn(conn, *plan, off) for conn, plan, off in zip(conns, plans, offs)])
+        t1 = time.perf_counter()
+    finally:
+        # release only what was checked out, even if a checkout failed
+        for conn in conns:
+            await pool.release(conn)
+        await r.aclose()
     return BenchResult(name=f"redis:{mode}", ops=total_ops, seconds=t1 - t0, lat_ms=lat)
 
 
+# -----------------------------
+# Preload (get/mixed runs): each connection pipelines its share of the keys
+# -----------------------------
+async def preload_hinotetsu(host: str, port: int, keys: list[bytes], value_size: int,
+                            connections: int, uds: str | None = None):
+    payload = rand_bytes(value_size)
+    clients = [HinotetsuClient(host, port, uds=uds) for _ in range(connections)]
+    for c in clients:
+        await c.connect()
+    await asyncio.gather(*[c.preload_many(keys[i::connections], payload)
+                           for i, c in enumerate(clients)])
+    for c in clients:
+        await c.close()
+
+
+async def preload_memcached(host: str, port: int, keys: list[bytes], value_size: int,
+                            connections: int, exptime: int, uds: str | None = None):
+    payload = rand_bytes(value_size)
+    clients = [MemcachedTextClient(host, port, uds=uds) for _ in range(connections)]
+    for c in clients:
+        await c.connect()
+    await asyncio.gather(*[c.preload_many(keys[i::connections], payload, exptime)
+                           for i, c in enumerate(clients)])
+    for c in clients:
+        await c.close()
+
+
+async def preload_redis(host: str, port: int, keys: list[bytes], value_size: int,
+                        connections: int, exptime: int, chunk: int = 10000):
+    r = await redis_make_client(host, port)
+    payload = rand_bytes(value_size)
+    ex = exptime if exptime > 0 else None
+
+    async def load(part: list[bytes]):
+        pipe = r.pipeline(transaction=False)
+        for i in range(0, len(part), chunk):
+            for key in part[i:i + chunk]:
+                pipe.set(key, payload, ex=ex)
+            await pipe.execute()
+
+    await asyncio.gather(*[load(keys[i::connections]) for i in range(connections)])
+    await r.aclose()
+
+
+# -----------------------------
+# Target dispatch and multi-process runs
+# -----------------------------
+async def preload_target(target: str, args, keys: list[bytes], connections: int):
+    if target == "hinotetsu":
+        await preload_hinotetsu(args.hinotetsu_host, args.hinotetsu_port, keys,
+                                args.value_size, connections, args.hinotetsu_uds)
+    elif target == "memcached":
+        await preload_memcached(args.memcached_host, args.memcached_port, keys,
+                                args.value_size, connections, args.ttl, args.memcached_uds)
+    elif target == "redis":
+        await preload_redis(args.redis_host, args.redis_port, keys,
+                            args.value_size, connections, args.ttl)
+    else:
+        raise ValueError(target)
+
+
+async def run_target(target: str, args, keys: list[bytes], total_ops: int, concurrency: int,
+                     first_worker: int = 0, ready=None) -> BenchResult:
+    if target == "hinotetsu":
+        return await bench_hinotetsu(args.hinotetsu_host, args.hinotetsu_port, keys,
+                                     args.value_size, concurrency, total_ops, args.mode,
+                                     args.pipeline_depth, args.latency_sample_rate,
+                                     args.hinotetsu_uds, args.hinotetsu_io, first_worker, ready)
+    if target == "memcached":
+        return await bench_memcached(args.memcached_host, args.memcached_port, keys,
+                                     args.value_size, concurrency, total_ops, args.mode, args.ttl,
+                                     args.pipeline_depth, args.latency_sample_rate,
+                                     args.memcached_uds, first_worker, ready)
+    if target == "redis":
+        return await bench_redis(args.redis_host, args.redis_port, keys,
+                                 args.value_size, concurrency, total_ops, args.mode, args.ttl,
+                                 args.pipeline_depth, args.latency_sample_rate, first_worker, ready)
+    raise ValueError(target)
+
+
+def bench_shard(target: str, args, keys: list[bytes], shard: int, barrier, queue):
+    # entry point of one --processes child: run this shard's slice of the
+    # ops and connections on its own event loop, send latencies back
+    n = args.processes
+    counts = split_ops(args.ops, n)
+    conns = split_ops(args.concurrency, n)
+
+    def ready():
+        return asyncio.to_thread(barrier.wait, SHARD_START_TIMEOUT_S)
+
+    async def shard_main():
+        res = await run_target(target, args, keys, counts[shard], conns[shard],
+                               sum(conns[:shard]), ready)
+        return res.seconds, res.lat_ms
+
+    try:
+        queue.put(run(args.loop, shard_main))
+    except BaseException as e:
+        barrier.abort()  # don't leave the other shards waiting at the start line
+        queue.put(f"shard {shard}: {e!r}")
+        raise
+
+
+def run_sharded(target: str, args, keys: list[bytes]) -> BenchResult:
+    # one process (and event loop) per shard; the shards start together and
+    # the slowest one sets the wall time of the merged result
+    ctx = multiprocessing.get_context("spawn")
+    n = args.processes
+    queue = ctx.Queue()
+    barrier = ctx.Barrier(n)
+    procs = [ctx.Process(target=bench_shard, args=(target, args, keys, i, barrier, queue))
+             for i in range(n)]
+    shards = []
+    try:
+        for p in procs:
+            p.start()
+        while len(shards) < n:
+            try:
+                shards.append(queue.get(timeout=SHARD_POLL_S))
+            except queue_mod.Empty:
+                # a shard killed outright (SIGKILL, OOM, segfault) never
+                # reports; whatever an exited shard did send is already in
+                # the pipe, so drain it before counting
+                exited = [p for p in procs if p.exitcode is not None]
+                while True:
+                    try:
+                        shards.append(queue.get_nowait())
+                    except queue_mod.Empty:
+                        break
+                if len(exited) > len(shards):
+                    codes = ", ".join(f"shard {procs.index(p)} exit {p.exitcode}" for p in exited)
+                    raise RuntimeError(f"shard process died without reporting ({codes})")
+    finally:
+        for p in procs:
+            if p.pid is None:  # never started
+                continue
+            if p.is_alive() and len(shards) < n:
+                p.terminate()
+            p.join()
+
+    errors = [s for s in shards if isinstance(s, str)]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    seconds = max(sec for sec, _ in shards)
+    lat = array("d")
+    for _, l in shards:
+        lat += l
+    return BenchResult(name=f"{target}:{args.mode}", ops=args.ops, seconds=seconds, lat_ms=lat)
+
+
 def print_table(results: list[BenchResult]):
     rows = [r.summary() for r in results]
     headers = ["name", "ops", "seconds", "ops_per_sec", "avg_ms", "p50_ms", "p95_ms", "p99_ms"]
@@ -336,12 +1100,18 @@ def print_table(results: list[BenchResult]):
         ]))
 
 
-async def main():
+def parse_args():
     ap = argparse.ArgumentParser()
     ap.add_argument("--hinotetsu-host", default="127.0.0.1")
     ap.add_argument("--hinotetsu-port", type=int, default=11211)
+    ap.add_argument("--hinotetsu-uds", default=None,
+                    help="Unix socket path; overrides --hinotetsu-host/--hinotetsu-port")
+    ap.add_argument("--hinotetsu-io", choices=["stream", "uring"], default="stream",
+                    help="uring batches sends via io_uring (pip install liburing, Linux >= 5.6)")
     ap.add_argument("--memcached-host", default="127.0.0.1")
     ap.add_argument("--memcached-port", type=int, default=11212)
+    ap.add_argument("--memcached-uds", default=None,
+                    help="Unix socket path; overrides --memcached-host/--memcached-port")
     ap.add_argument("--redis-host", default="127.0.0.1")
     ap.add_argument("--redis-port", type=int, default=6379)
 
@@ -351,40 +1121,60 @@ async def main():
     ap.add_argument("--concurrency", type=int, default=64)
     ap.add_argument("--ops", type=int, default=200000)
     ap.add_argument("--mode", choices=["set", "get", "mixed"], default="mixed")
+    ap.add_argument("--pipeline-depth", type=int, default=1,
+                    help="max in-flight commands per connection (1 = request/response)")
+    ap.add_argument("--latency-sample-rate", type=float, default=0.1,
+                    help="fraction of ops whose latency is recorded (0 < rate <= 1)")
     ap.add_argument("--ttl", type=int, default=0, help="memcached/redis only (seconds)")
     ap.add_argument("--targets", default="hinotetsu,memcached,redis",
                     help="comma-separated: hinotetsu,memcached,redis")
+    ap.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default="auto",
+                    help="event loop; auto uses uvloop when it is installed")
+    ap.add_argument("--processes", type=int, default=1,
+                    help="split --ops and --concurrency across this many processes")
     args = ap.parse_args()
+    if args.pipeline_depth < 1:
+        ap.error("--pipeline-depth must be >= 1")
+    if not 0.0 < args.latency_sample_rate <= 1.0:
+        ap.error("--latency-sample-rate must be in (0, 1]")
+    if not 1 <= args.processes <= args.concurrency:
+        ap.error("--processes must be between 1 and --concurrency")
+    return args
+
+
+def run(loop: str, coro_fn, *args):
+    if loop != "asyncio":
+        try:
+            import uvloop
+        except ImportError:
+            if loop == "uvloop":
+                raise SystemExit("uvloop not installed. pip install uvloop")
+        else:
+            return uvloop.run(coro_fn(*args))
+    return asyncio.run(coro_fn(*args))
 
+
+async def main(args):
     keys = make_keys(args.keyspace, args.key_len)
-    preload_ops = min(args.keyspace, 20000)
+    preload_keys = keys[:20000]
+    preload_conns = min(32, args.concurrency)
 
     targets = [t.strip() for t in args.targets.split(",") if t.strip()]
     results = []
 
-    if "hinotetsu" in targets:
-        if args.mode in ("get", "mixed"):
-            await bench_hinotetsu(args.hinotetsu_host, args.hinotetsu_port, keys,
-                                  args.value_size, min(32, args.concurrency), preload_ops, "set")
-        results.append(await bench_hinotetsu(args.hinotetsu_host, args.hinotetsu_port, keys,
-                                             args.value_size, args.concurrency, args.ops, args.mode))
-
-    if "memcached" in targets:
-        if args.mode in ("get", "mixed"):
-            await bench_memcached(args.memcached_host, args.memcached_port, keys,
-                                  args.value_size, min(32, args.concurrency), preload_ops, "set", args.ttl)
-        results.append(await bench_memcached(args.memcached_host, args.memcached_port, keys,
-                                             args.value_size, args.concurrency, args.ops, args.mode, args.ttl))
-
-    if "redis" in targets:
+    for target in ("hinotetsu", "memcached", "redis"):
+        if target not in targets:
+            continue
         if args.mode in ("get", "mixed"):
-            await bench_redis(args.redis_host, args.redis_port, keys,
-                              args.value_size, min(32, args.concurrency), preload_ops, "set", args.ttl)
-        results.append(await bench_redis(args.redis_host, args.redis_port, keys,
-                                         args.value_size, args.concurrency, args.ops, args.mode, args.ttl))
+            await preload_target(target, args, preload_keys, preload_conns)
+        if args.processes > 1:
+            results.append(await asyncio.to_thread(run_sharded, target, args, keys))
+        else:
+            results.append(await run_target(target, args, keys, args.ops, args.concurrency))
 
     print_table(results)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    run(args.loop, main, args)